@@ -0,0 +1,96 @@
+"""
+Startup-time benchmark guarding the cold import time of shiroq.
+
+Each import is timed in fresh interpreters, and reported on top of the time
+needed to import the array backend alone. The benchmark fails if that overhead
+exceeds the budget, or if an optional dependency is imported eagerly.
+
+Usage: python benchmarks/import_time.py [--runs N] [--budget SECONDS]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+STATEMENTS = [
+    "import shiroq",
+    "from shiroq import QuantumRegister",
+    "from shiroq import parse_program",
+]
+
+# Only needed by some features, so they should not be imported with shiroq
+LAZY_MODULES = ["matplotlib", "scipy", "multiprocessing.shared_memory"]
+
+TIMER = """
+import sys, time
+start = time.perf_counter()
+{}
+elapsed = time.perf_counter() - start
+print(elapsed, ",".join(m for m in {} if m in sys.modules))
+"""
+
+
+def time_import(statement, runs):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([SRC, env.get("PYTHONPATH", "")])
+
+    timings = list()
+    eager = set()
+
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", TIMER.format(statement, LAZY_MODULES)],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.split()
+
+        timings.append(float(output[0]))
+        if len(output) > 1:
+            eager.update(output[1].split(","))
+
+    return statistics.median(timings), eager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget", type=float, default=0.05)
+    args = parser.parse_args()
+
+    # Run the backend module on its own, as importing it would import shiroq
+    baseline, _ = time_import(
+        "import runpy; runpy.run_path({!r})".format(
+            os.path.join(SRC, "shiroq", "backend.py")
+        ),
+        args.runs,
+    )
+    print("{:<40} {:8.1f} ms".format("array backend", 1000 * baseline))
+
+    failed = False
+    for statement in STATEMENTS:
+        elapsed, eager = time_import(statement, args.runs)
+        overhead = elapsed - baseline
+
+        print(
+            "{:<40} {:8.1f} ms (+{:.1f} ms)".format(
+                statement, 1000 * elapsed, 1000 * overhead
+            )
+        )
+
+        if overhead > args.budget:
+            print("  over the budget of {:.1f} ms".format(1000 * args.budget))
+            failed = True
+        if len(eager) > 0:
+            print("  eagerly imports {}".format(", ".join(sorted(eager))))
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
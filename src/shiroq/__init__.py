@@ -1,3 +1,14 @@
+from .circuit import Circuit
 from .gate import QuantumGate
 from .register import QuantumRegister
 from .parser import parse_program
+
+
+def __getattr__(name):
+    # The sharded register pulls in multiprocessing, so it is only imported when used
+    if name == "ShardedQuantumRegister":
+        from .sharded import ShardedQuantumRegister
+
+        return ShardedQuantumRegister
+
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
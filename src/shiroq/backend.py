@@ -0,0 +1,17 @@
+"""
+The array backend shared by all modules, probed once at import time.
+CuPy is used if installed, unless the SHIROQ_BACKEND environment variable
+is set to numpy (which spares importing CuPy, eg. in short-lived CPU jobs).
+"""
+import os
+
+if os.environ.get("SHIROQ_BACKEND", "").lower() == "numpy":
+    import numpy as np
+else:
+    try:
+        import cupy as np
+    except ModuleNotFoundError:
+        try:
+            import numpy as np
+        except ModuleNotFoundError:
+            print("Neither CuPy nor NumPy are installed")
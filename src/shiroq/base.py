@@ -0,0 +1,150 @@
+from .backend import np
+
+import math
+from datetime import datetime
+
+from .circuit import Circuit
+from .gate import QuantumGate
+from .openqasm import _circuit_to_qasm
+
+
+class BaseRegister:
+    """
+    What the registers share, whatever the way they store the statevector: the common
+    states, the endianness, running programs and checking the qubits of the gates,
+    states and measurements. The registers provide add_gate, apply and _get_operations
+    """
+
+    # Have a set of common states
+    zero = np.array([1.0, 0.0], dtype="complex")
+    one = np.array([0.0, 1.0], dtype="complex")
+    plus = np.array([1 / np.sqrt(2), 1 / np.sqrt(2)], dtype="complex")
+    minus = np.array([1 / np.sqrt(2), -1 / np.sqrt(2)], dtype="complex")
+
+    __one_test = np.array(1.0)
+
+    def __init__(self, size, endianness="big"):
+        assert size > 0, "Can not have empty register"
+
+        self.set_endianness(endianness)
+        self.__size = size
+
+    def get_register_size(self):
+        return self.__size
+
+    def set_endianness(self, endianness):
+        assert endianness in ["big", "little"], "Endianness can only be big or little"
+        self.__is_big_endian = endianness == "big"
+
+    def get_endianness(self):
+        return "big" if self.__is_big_endian else "little"
+
+    def _appropriate_index(self, index):
+        return index if self.__is_big_endian else self.__size - index - 1
+
+    def run_program(self, program, global_params=None, reversed=False):
+        if isinstance(program, list):
+            program = Circuit.from_list(program)
+        assert isinstance(program, Circuit), "Program must be a circuit or a list"
+
+        # Reverse the operations of the program (eg. can be to run QFT_dag from QFT program)
+        if reversed:
+            program = program.reversed()
+
+        # Gates with the same parameters are only created once
+        gates = dict()
+
+        # Go through each instruction with the global parameters replaced
+        for name, params, targets in program.bind(global_params):
+            key = (name, *params)
+            if key not in gates:
+                gates[key] = QuantumGate(name, *params)
+
+            # Add the gate to the circuit
+            self.add_gate(gates[key], targets)
+
+        self.apply()
+
+    def store_as_qasm(
+        self,
+        filename=datetime.now().strftime("%d/%m/%Y-%H:%M:%S"),
+        qubits_to_measure=None,
+    ):
+        assert (
+            all([target < self.__size for target in qubits_to_measure])
+            if qubits_to_measure is not None
+            else True
+        ), "Some qubits not in register"
+
+        if qubits_to_measure is not None:
+            qubits_to_measure = [
+                self._appropriate_index(qubit) for qubit in qubits_to_measure
+            ]
+
+        _circuit_to_qasm(
+            self._get_operations(), self.__size, filename, qubits_to_measure
+        )
+        return
+
+    def _check_state(self, index, state):
+        """
+        Checks that a single qubit state can be set on a qubit of the register
+        """
+        assert index < self.__size, "Qubit not in register"
+        np.testing.assert_array_equal(
+            np.around(np.sum(np.absolute(state) ** 2)),
+            self.__one_test,
+            "Non-quantum mechanical state",
+            False,
+        )
+
+    def _check_gate(self, gate, targets):
+        """
+        Just a bunch of assertions to check the sanity of the gate parameters
+        """
+        assert all(
+            [target < self.__size for target in targets]
+        ), "Some qubits not in register"
+        assert len(targets) == len(set(targets)), "All target qubits must be different!"
+
+        affected_qubits = int(math.log(gate.get_matrix().shape[0], 2))
+        assert affected_qubits <= self.__size, "Gate too big for circuit"
+
+        if affected_qubits > 1:
+            assert affected_qubits == len(
+                targets
+            ), "Too many/too few arguments for target qubits"
+
+    def _check_measured_qubits(self, qubits_idx=None):
+        """
+        Checks the qubits to measure, all of them by default, and returns their indices
+        """
+        assert qubits_idx is None or isinstance(
+            qubits_idx, list
+        ), "Incorrect way of indexing qubits"
+
+        if qubits_idx is None:
+            qubits_idx = list(range(self.__size))
+
+        assert len(qubits_idx) > 0, "Need at least one qubit"
+        assert all(
+            [0 <= qubit < self.__size for qubit in qubits_idx]
+        ), "Some qubits not in register"
+
+        return [self._appropriate_index(i) for i in qubits_idx]
+
+    def _counts_of_samples(self, values, counts, qubits_idx):
+        """
+        Turns the sampled basis states and their counts into the counts of the
+        bit strings of the measured qubits
+        """
+        # Convert to binary
+        values = [format(i, "0" + str(self.__size) + "b") for i in values]
+
+        # Cherrypick the needed qubits
+        res = dict()
+        for value, count in zip(values, counts):
+            key = "".join([value[i] for i in qubits_idx])
+            res[key] = res.get(key, 0) + count
+
+        return res
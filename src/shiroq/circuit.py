@@ -0,0 +1,318 @@
+# The circuit only holds indices and parameters, which are kept on the CPU
+import numpy as np
+
+from itertools import chain
+
+from .gate import QuantumGate
+
+
+class Circuit:
+    """
+    A program stored as a structure of arrays: one opcode and one row of parameter
+    slots per instruction, with the targets of all instructions in a single flat array.
+    Global (symbolic) parameters are stored as indices into the list of their names.
+    Iterating over a circuit yields (gate name, parameters, targets) triples.
+    """
+
+    __slots__ = (
+        "__length",
+        "__gate_names",
+        "__opcodes",
+        "__params",
+        "__symbols",
+        "__symbol_names",
+        "__target_offsets",
+        "__targets",
+    )
+
+    max_params = 3
+
+    def __init__(self, capacity=16):
+        self.__length = 0
+
+        # Gate names and global parameter names, indexed by opcodes and symbols
+        self.__gate_names = list()
+        self.__symbol_names = list()
+
+        self.__opcodes = np.zeros(capacity, dtype=np.uint16)
+        self.__params = np.zeros((capacity, self.max_params), dtype=np.float64)
+        self.__symbols = np.full((capacity, self.max_params), -1, dtype=np.int32)
+
+        # The targets of instruction i are targets[target_offsets[i]:target_offsets[i + 1]]
+        self.__target_offsets = np.zeros(capacity + 1, dtype=np.int64)
+        self.__targets = np.zeros(capacity, dtype=np.int32)
+
+    @classmethod
+    def from_list(cls, program):
+        """
+        Creates a circuit from a list of instructions, each as [gate name, *params, targets]
+        """
+        program = list(program)
+
+        # Gather the columns as lists, and convert them to arrays at once,
+        # as filling the arrays element by element is slow
+        gate_names = list()
+        opcodes_by_name = dict()
+        for name in set([instruction[0] for instruction in program]):
+            # Different spellings of a gate name share the same opcode
+            if name.lower() not in gate_names:
+                gate_names.append(name.lower())
+            opcodes_by_name[name] = gate_names.index(name.lower())
+
+        opcodes = np.array(
+            [opcodes_by_name[instruction[0]] for instruction in program],
+            dtype=np.uint16,
+        )
+
+        target_counts = [len(instruction[-1]) for instruction in program]
+        targets = list(
+            chain.from_iterable([instruction[-1] for instruction in program])
+        )
+
+        # Each gate must come with exactly the parameters its name implies
+        param_counts = (
+            np.array([len(instruction) for instruction in program], dtype=np.int64) - 2
+        )
+        expected_counts = np.array(
+            [cls.__expected_params_count(name) for name in gate_names], dtype=np.int64
+        )
+        mismatches = np.flatnonzero(param_counts != expected_counts[opcodes])
+        assert (
+            len(mismatches) == 0
+        ), "Invalid parameter count for gate {}, expected {} parameters".format(
+            program[mismatches[0]][0], expected_counts[opcodes[mismatches[0]]]
+        )
+
+        # Most gates do not have parameters, so only the others are filled in
+        parametric = np.flatnonzero(param_counts > 0)
+        param_counts = param_counts[parametric]
+        param_lists = [program[i][1:-1] for i in parametric.tolist()]
+
+        values = list(chain.from_iterable(param_lists))
+
+        # Row and slot of each of the parameters
+        rows = np.repeat(parametric, param_counts)
+        starts = np.cumsum(param_counts) - param_counts
+        slots = np.arange(len(values)) - np.repeat(starts, param_counts)
+
+        # Global parameters are numbered by their first appearance
+        symbol_names = dict()
+        symbols = [-1] * len(values)
+        for k in [k for k, param in enumerate(values) if isinstance(param, str)]:
+            symbols[k] = symbol_names.setdefault(values[k], len(symbol_names))
+            values[k] = 0.0
+
+        circuit = cls(0)
+
+        circuit.__length = len(program)
+        circuit.__gate_names = gate_names
+        circuit.__symbol_names = list(symbol_names.keys())
+
+        circuit.__opcodes = opcodes
+
+        circuit.__params = np.zeros((len(program), cls.max_params), dtype=np.float64)
+        circuit.__params[rows, slots] = values
+        circuit.__symbols = np.full((len(program), cls.max_params), -1, dtype=np.int32)
+        circuit.__symbols[rows, slots] = symbols
+
+        circuit.__target_offsets = np.zeros(len(program) + 1, dtype=np.int64)
+        circuit.__target_offsets[1:] = np.cumsum(target_counts)
+        circuit.__targets = np.array(targets, dtype=np.int32)
+
+        return circuit
+
+    def to_list(self):
+        return [[name] + params + [targets] for name, params, targets in self]
+
+    def __repr__(self):
+        return "Circuit({})".format(self.to_list())
+
+    def __len__(self):
+        return self.__length
+
+    def get_symbols(self):
+        return list(self.__symbol_names)
+
+    def append(self, name, params, targets):
+        name = name.lower()
+        params = list(params) if params is not None else list()
+
+        expected_count = self.__expected_params_count(name)
+        assert (
+            len(params) == expected_count
+        ), "Invalid parameter count for gate {}, expected {} parameters".format(
+            name, expected_count
+        )
+
+        if self.__length == len(self.__opcodes):
+            self.__resize_instructions(max(2 * len(self.__opcodes), 16))
+
+        start = self.__target_offsets[self.__length]
+        end = start + len(targets)
+
+        if end > len(self.__targets):
+            self.__resize_targets(max(2 * len(self.__targets), end, 16))
+
+        i = self.__length
+
+        if name not in self.__gate_names:
+            self.__gate_names.append(name)
+        self.__opcodes[i] = self.__gate_names.index(name)
+
+        self.__params[i] = 0.0
+        self.__symbols[i] = -1
+        for j, param in enumerate(params):
+            if isinstance(param, str):
+                if param not in self.__symbol_names:
+                    self.__symbol_names.append(param)
+                self.__symbols[i, j] = self.__symbol_names.index(param)
+            else:
+                self.__params[i, j] = param
+
+        self.__targets[start:end] = targets
+        self.__target_offsets[i + 1] = end
+
+        self.__length += 1
+
+    def __resize_instructions(self, capacity):
+        self.__opcodes = np.resize(self.__opcodes, capacity)
+        self.__params = np.resize(self.__params, (capacity, self.max_params))
+        self.__symbols = np.resize(self.__symbols, (capacity, self.max_params))
+        self.__target_offsets = np.resize(self.__target_offsets, capacity + 1)
+
+    def __resize_targets(self, capacity):
+        self.__targets = np.resize(self.__targets, capacity)
+
+    @staticmethod
+    def __expected_params_count(name):
+        """
+        Returns the number of parameters a gate name implies
+        """
+        name = name.lower()
+        name = name[1:] if name[0] == "c" else name
+
+        if name in QuantumGate.single_parameter_gates:
+            return 1
+        elif name == "u3":
+            return 3
+        return 0
+
+    def __params_count(self):
+        """
+        Returns the number of parameters of each gate name
+        """
+        return [self.__expected_params_count(name) for name in self.__gate_names]
+
+    def __iterate(self, params, symbols=None):
+        n = self.__length
+
+        # Convert the arrays once, as indexing them element by element is slow
+        opcodes = self.__opcodes[:n].tolist()
+        offsets = self.__target_offsets[: n + 1].tolist()
+        targets = self.__targets[: offsets[-1]].tolist()
+        counts = self.__params_count()
+
+        for i in range(n):
+            instruction = (
+                self.__gate_names[opcodes[i]],
+                params[i][: counts[opcodes[i]]],
+                targets[offsets[i] : offsets[i + 1]],
+            )
+
+            if symbols is None:
+                yield instruction
+            else:
+                yield instruction + (symbols.get(i, []),)
+
+    def __iter__(self):
+        n = self.__length
+
+        params = self.__params[:n].tolist()
+        symbols = self.__symbols[:n].tolist()
+
+        # Put the names of the global parameters back
+        params = [
+            [
+                self.__symbol_names[symbol] if symbol >= 0 else param
+                for param, symbol in zip(row_params, row_symbols)
+            ]
+            for row_params, row_symbols in zip(params, symbols)
+        ]
+
+        return self.__iterate(params)
+
+    def bind(self, global_params=None, with_symbols=False):
+        """
+        Iterates over the instructions with the global parameters replaced by their values.
+        With with_symbols, each instruction also comes with the (slot, name) pairs of its
+        global parameters
+        """
+        n = self.__length
+
+        params = self.__params[:n].copy()
+        symbols = self.__symbols[:n]
+
+        if len(self.__symbol_names) > 0:
+            assert global_params is not None and all(
+                [symbol in global_params.keys() for symbol in self.__symbol_names]
+            ), "Global parameter not provided!"
+
+            values = [global_params[symbol] for symbol in self.__symbol_names]
+
+            mask = symbols >= 0
+            params[mask] = np.array(values, dtype=np.float64)[symbols[mask]]
+
+        if not with_symbols:
+            return self.__iterate(params.tolist())
+
+        # Only the instructions having global parameters get pairs
+        pairs = dict()
+        for i, slot in zip(*np.nonzero(symbols >= 0)):
+            pairs.setdefault(int(i), list()).append(
+                (int(slot), self.__symbol_names[symbols[i, slot]])
+            )
+
+        return self.__iterate(params.tolist(), pairs)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.__select(np.arange(self.__length)[index])
+
+        if index < 0:
+            index += self.__length
+        assert 0 <= index < self.__length, "Instruction index out of range"
+
+        return next(iter(self.__select(np.array([index]))))
+
+    def reversed(self):
+        """
+        Returns a new circuit with the instructions in the reverse order
+        """
+        return self.__select(np.arange(self.__length)[::-1])
+
+    def __select(self, rows):
+        """
+        Returns a new circuit made of the given instructions
+        """
+        res = Circuit(max(len(rows), 1))
+
+        res.__length = len(rows)
+        res.__gate_names = list(self.__gate_names)
+        res.__symbol_names = list(self.__symbol_names)
+
+        res.__opcodes[: len(rows)] = self.__opcodes[rows]
+        res.__params[: len(rows)] = self.__params[rows]
+        res.__symbols[: len(rows)] = self.__symbols[rows]
+
+        starts = self.__target_offsets[rows]
+        lengths = self.__target_offsets[rows + 1] - starts
+
+        res.__target_offsets[1 : len(rows) + 1] = np.cumsum(lengths)
+
+        # Gather the targets of each instruction as contiguous runs
+        total = res.__target_offsets[len(rows)]
+        gather = np.repeat(starts - res.__target_offsets[: len(rows)], lengths)
+        res.__resize_targets(max(total, 1))
+        res.__targets[:total] = self.__targets[gather + np.arange(total)]
+
+        return res
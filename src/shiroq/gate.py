@@ -1,15 +1,11 @@
-try:
-    import cupy as np
-except ModuleNotFoundError:
-    try:
-        import numpy as np
-    except ModuleNotFoundError:
-        print("Neither Cupy nor NumPy are installed")
+from .backend import np
 
-from math import cos, sin, pi
+from math import cos, sin, pi, sqrt
 
 
 class QuantumGate:
+    __slots__ = ("name", "params", "__matrix", "__base_name", "__controlled")
+
     __supported_gates = ["i", "z", "x", "y", "h", "swap", "cx", "s", "t"]
 
     __X = np.array([[0.0, 1.0], [1.0, 0.0]], dtype="complex")
@@ -38,6 +34,9 @@ class QuantumGate:
         controlled = True if gate_name[0] == "c" else False
         gate_name = gate_name[1:] if gate_name[0] == "c" else gate_name
 
+        self.__base_name = gate_name
+        self.__controlled = controlled
+
         if len(inp) == 1:
             # Non-parametric gates
             self.__matrix = self.__get_gate_by_name(gate_name)
@@ -66,6 +65,59 @@ class QuantumGate:
     def get_matrix(self):
         return self.__matrix
 
+    def get_derivative(self, index):
+        """
+        Returns the derivative of the gate's matrix with respect to its index-th parameter
+        """
+        assert self.params is not None and index < len(
+            self.params
+        ), "Gate does not have such a parameter"
+
+        if self.__base_name == "u3":
+            derivative = self.__calculate_arbitrary_unitary_derivative(
+                index, *self.params
+            )
+        else:
+            derivative = self.__calculate_axis_rotation_derivative(
+                self.__base_name, self.params[0]
+            )
+
+        # The controlled part does not depend on the parameter
+        if self.__controlled:
+            res = np.zeros((4, 4), dtype="complex")
+            res[2:4, 2:4] = derivative
+            derivative = res
+
+        return np.around(derivative, 10)
+
+    def get_shift_rule(self, index):
+        """
+        Returns the (coefficient, shift) pairs of the parameter-shift rule of the index-th
+        parameter, i.e. the derivative of an expectation value is the sum of the coefficients
+        times the expectation values with that parameter shifted
+        """
+        assert self.params is not None and index < len(
+            self.params
+        ), "Gate does not have such a parameter"
+
+        # Controlled rotations have a generator with three eigenvalues (0 and +-1/2),
+        # which needs the four-term rule. All other parameters only need two terms
+        if self.__controlled and (
+            self.__base_name in ["rx", "ry", "rz"]
+            or (self.__base_name == "u3" and index == 0)
+        ):
+            d_plus = (sqrt(2) + 1) / (4 * sqrt(2))
+            d_minus = (sqrt(2) - 1) / (4 * sqrt(2))
+
+            return [
+                (d_plus, pi / 2),
+                (-d_plus, -pi / 2),
+                (-d_minus, 3 * pi / 2),
+                (d_minus, -3 * pi / 2),
+            ]
+
+        return [(0.5, pi / 2), (-0.5, -pi / 2)]
+
     def __get_gate_by_name(self, name):
         assert (
             name in self.__supported_gates
@@ -125,6 +177,32 @@ class QuantumGate:
         else:
             return np.array([[1, 0], [0, np.exp(1.0j * theta)]], dtype="complex")
 
+    def __calculate_axis_rotation_derivative(self, axis, theta):
+        axis = axis[-1]
+
+        cosTheta = cos(theta / 2)
+        sinTheta = sin(theta / 2)
+
+        if axis == "x":
+            return 0.5 * np.array(
+                [[-sinTheta, -1.0j * cosTheta], [-1.0j * cosTheta, -sinTheta]],
+                dtype="complex",
+            )
+        elif axis == "y":
+            return 0.5 * np.array(
+                [[-sinTheta, -cosTheta], [cosTheta, -sinTheta]], dtype="complex"
+            )
+        elif axis == "z":
+            return 0.5 * np.array(
+                [
+                    [-1.0j * np.exp(-1.0j * theta / 2), 0],
+                    [0, 1.0j * np.exp(1.0j * theta / 2)],
+                ],
+                dtype="complex",
+            )
+        else:
+            return np.array([[0, 0], [0, 1.0j * np.exp(1.0j * theta)]], dtype="complex")
+
     def __calculate_arbitrary_unitary(self, name, theta, phi, lamda):
         assert name == "u3", "Wrong gate name. should be U3"
         assert np.isreal(theta), "Theta is not real"
@@ -146,6 +224,31 @@ class QuantumGate:
             dtype="complex",
         )
 
+    def __calculate_arbitrary_unitary_derivative(self, index, theta, phi, lamda):
+        cosTheta = cos(theta / 2)
+        sinTheta = sin(theta / 2)
+        exp_phi = np.exp(1.0j * phi)
+        exp_lambda = np.exp(1.0j * lamda)
+
+        if index == 0:
+            return 0.5 * np.array(
+                [
+                    [-sinTheta, -exp_lambda * cosTheta],
+                    [exp_phi * cosTheta, -exp_lambda * exp_phi * sinTheta],
+                ],
+                dtype="complex",
+            )
+        elif index == 1:
+            return 1.0j * np.array(
+                [[0, 0], [exp_phi * sinTheta, exp_lambda * exp_phi * cosTheta]],
+                dtype="complex",
+            )
+        else:
+            return 1.0j * np.array(
+                [[0, -exp_lambda * sinTheta], [0, exp_lambda * exp_phi * cosTheta]],
+                dtype="complex",
+            )
+
     def __get_controlled_version(self):
         if self.is_single_qubit():
             res = np.identity(4, dtype=complex)
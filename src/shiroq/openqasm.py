@@ -124,7 +124,7 @@ dependency_graph = {
 dependency_graph = defaultdict(lambda: [], dependency_graph)
 
 
-def _list_to_qasm(list, circuit_size, filename: str, qubits_to_measure=None):
+def _circuit_to_qasm(circuit, circuit_size, filename: str, qubits_to_measure=None):
     if filename.endswith(".qasm"):
         filename = filename[: -len(".qasm")]
 
@@ -144,27 +144,27 @@ def _list_to_qasm(list, circuit_size, filename: str, qubits_to_measure=None):
     if qubits_to_measure is not None:
         ops += "creg c[{}];\n".format(len(qubits_to_measure))
 
-    for gate, qubit_idx in list:
-        _add_dependencies(gate.name, added_deps, file)
-        if gate.name not in added_deps:
-            added_deps.add(gate.name)
-            file.write(globals()[gate.name] + "\n")
+    for gate_name, gate_params, qubit_idx in circuit:
+        _add_dependencies(gate_name, added_deps, file)
+        if gate_name not in added_deps:
+            added_deps.add(gate_name)
+            file.write(globals()[gate_name] + "\n")
 
         # Add it to ops (with params if present)
         params = (
             ""
-            if gate.params is None
-            else "({})".format(",".join(map(lambda x: str(x), gate.params)))
+            if len(gate_params) == 0
+            else "({})".format(",".join(map(lambda x: str(x), gate_params)))
         )
-        if gate.name.startswith("c") or gate.name == "swap":
+        if gate_name.startswith("c") or gate_name == "swap":
             ops += "{}{} {};\n".format(
-                gate.name,
+                gate_name,
                 params,
                 ",".join(map(lambda x: "q[" + str(x) + "]", qubit_idx)),
             )
         else:
             for qubit in qubit_idx:
-                ops += "{}{} q[{}];\n".format(gate.name, params, qubit)
+                ops += "{}{} q[{}];\n".format(gate_name, params, qubit)
 
     if qubits_to_measure is not None:
         for idx, qubit in enumerate(qubits_to_measure):
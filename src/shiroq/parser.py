@@ -1,3 +1,4 @@
+from .circuit import Circuit
 from .gate import QuantumGate
 
 
@@ -17,26 +18,33 @@ def parse_program(program):
 
 
 def _parse_list(program_list):
+    # Names of the parameters of each gate, worked out once per gate
+    param_names = dict()
+
     # Transform dicts to parameters
     params = list()
     for instruction in program_list:
-        instr_params = list()
+        gate = instruction["gate"]
 
-        instr_params.append(instruction["gate"])
+        if gate not in param_names:
+            if gate[0] == "c":
+                tmp = gate[1:]
+            else:
+                tmp = gate
 
-        if instruction["gate"][0] == "c":
-            tmp = instruction["gate"][1:]
-        else:
-            tmp = instruction["gate"]
+            if tmp.lower() in QuantumGate.single_parameter_gates:
+                param_names[gate] = ["theta"]
+            elif tmp.lower() == "u3":
+                param_names[gate] = ["theta", "phi", "lambda"]
+            else:
+                param_names[gate] = []
 
-        if tmp.lower() in QuantumGate.single_parameter_gates:
-            instr_params.append(instruction["params"]["theta"])
-        elif tmp.lower() == "u3":
-            instr_params.append(instruction["params"]["theta"])
-            instr_params.append(instruction["params"]["phi"])
-            instr_params.append(instruction["params"]["lambda"])
+        instr_params = [gate]
+        for name in param_names[gate]:
+            instr_params.append(instruction["params"][name])
 
         instr_params.append(instruction["target"])
         params.append(instr_params)
 
-    return params
+    # Convert them at once to a circuit
+    return Circuit.from_list(params)
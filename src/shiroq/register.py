@@ -1,44 +1,35 @@
-try:
-    import cupy as np
-except ModuleNotFoundError:
-    try:
-        import numpy as np
-    except ModuleNotFoundError:
-        print("Neither CuPy nor NumPy are installed")
+from .backend import np
 
 import math
 import warnings
-from datetime import datetime
+from collections import Counter
 
+from .base import BaseRegister
 from .gate import QuantumGate
-from .openqasm import _list_to_qasm
-from .utils import reorder_gate, tensor_product_matrix_list, tensor_product_vector_list
+from .circuit import Circuit
+from .stabilizer import StabilizerTableau
+from .utils import (
+    apply_gate_to_tensor,
+    reorder_gate,
+    tensor_product_matrix_list,
+    tensor_product_vector_list,
+)
 
 
-class QuantumRegister:
-    # Have a set of common states
-    zero = np.array([1.0, 0.0], dtype="complex")
-    one = np.array([0.0, 1.0], dtype="complex")
-    plus = np.array([1 / np.sqrt(2), 1 / np.sqrt(2)], dtype="complex")
-    minus = np.array([1 / np.sqrt(2), -1 / np.sqrt(2)], dtype="complex")
-
-    __one_test = np.array(1.0)
-
+class QuantumRegister(BaseRegister):
     def __init__(self, size, endianness="big"):
-        assert size < 26, "Maximum allowed qubits is 25"
-        assert size > 0, "Can not have empty register"
-
-        self.set_endianness(endianness)
+        super().__init__(size, endianness)
         self.__size = size
 
         self.reset()
 
     def reset(self):
         # operations list
-        self.__operations = list()
+        self.__operations = Circuit()
 
         # Needed for efficiency purposes
         self.__dirty = True
+        self.__probabilities = None
         self.__unapplied_gates = False
         self.__opmatrix_calculated = False
 
@@ -51,109 +42,269 @@ class QuantumRegister:
         self.__gate_cache = np.tile(
             np.eye(2, dtype="complex"), (self.__size, 1)
         ).reshape(-1, 2, 2)
-        self.__operators_matrix = np.eye(2 ** self.__size)
 
-    def get_register_size(self):
-        return self.__size
+        # Clifford circuits are run on a stabilizer tableau, until a non-Clifford
+        # gate (or state) shows up. The unitary is only allocated after that
+        self.__stabilizer = True
+        self.__tableau = None
+        self.__tableau_operations = 0
+        self.__operators_matrix = None
 
-    def set_endianness(self, endianness):
-        assert endianness in ["big", "little"], "Endianness can only be big or little"
-        self.__is_big_endian = endianness == "big"
+    def gradient(self, program, observable, global_params=None, method="adjoint"):
+        """
+        Calculates the derivatives of the expectation value of an observable, after running
+        a program on the current state, with respect to the global parameters of the program.
+        The observable is either a Hermitian matrix or, with the parameter-shift method,
+        a function of the statevector returning an expectation value <psi|H|psi> (the
+        shift rules give wrong derivatives for functions that are not linear in |psi><psi|).
+        The adjoint method needs one forward and one reverse sweep whatever the number of
+        parameters, while the parameter-shift method needs a few runs of the program per
+        occurrence of each parameter.
+        The register itself is left untouched.
+        """
+        if isinstance(program, list):
+            program = Circuit.from_list(program)
+        assert isinstance(program, Circuit), "Program must be a circuit or a list"
+        assert method in [
+            "adjoint",
+            "parameter-shift",
+        ], "Method can only be adjoint or parameter-shift"
+        assert (
+            not self.__unapplied_gates
+        ), "Some gates are not applied yet! Call QuantumRegister.apply()"
+
+        if not callable(observable):
+            observable = np.asarray(observable, dtype="complex")
+            assert observable.shape == (
+                2 ** self.__size,
+                2 ** self.__size,
+            ), "Observable must match the register size"
+        else:
+            # The adjoint method needs to apply the observable to a state
+            assert (
+                method == "parameter-shift"
+            ), "Function observables need the parameter-shift method"
 
-    def get_endianness(self):
-        return "big" if self.__is_big_endian else "little"
+        operations = self.__bind_program(program, global_params)
 
-    def run_program(self, program, global_params=None, reversed=False):
-        assert isinstance(program, list), "Program must be a list"
+        if method == "adjoint":
+            return self.__adjoint_gradient(operations, observable)
+        return self.__parameter_shift_gradient(operations, observable)
 
-        # Reverse the operations of the program (eg. can be to run QFT_dag from QFT program)
-        if reversed:
-            program.reverse()
+    def __bind_program(self, program, global_params):
+        """
+        Creates the gates of a program, keeping track of which gate parameters
+        are global ones. Single qubit gates are split per target
+        """
+        operations = list()
 
-        # Go through each instruction (read, gate) and retrieve its parameters
-        for instruction in program:
-            params = instruction[:-1]
+        for name, params, targets, symbols in program.bind(
+            global_params, with_symbols=True
+        ):
+            gate = QuantumGate(name, *params)
+            self._check_gate(gate, targets)
 
-            # Replace the global parameters
-            for i in range(1, len(params)):
-                if isinstance(params[i], str):
-                    assert (
-                        params[i] in global_params.keys()
-                    ), "Global parameter not provided!"
+            if gate.is_single_qubit():
+                for target in targets:
+                    operations.append((gate, params, [target], symbols))
+            else:
+                operations.append((gate, params, targets, symbols))
 
-                    params[i] = global_params[params[i]]
+        return operations
 
-            # Create the gate with the captured parameters
-            gate = QuantumGate(*params)
+    def __run_operations(self, operations):
+        """
+        Runs a list of bound operations gate by gate on a copy of the statevector
+        """
+        state = np.reshape(self.get_statevector().copy(), self.__size * [2])
+
+        for gate, _, targets, _ in operations:
+            apply_gate_to_tensor(state, gate.get_matrix(), targets)
+
+        return state
+
+    def __adjoint_gradient(self, operations, observable):
+        # Forward sweep, then apply the observable to get the adjoint state
+        state = self.__run_operations(operations)
+        adjoint = np.reshape(observable @ np.reshape(state, -1), self.__size * [2])
+
+        gradient = dict()
+
+        # Reverse sweep, uncomputing the state and the adjoint state gate by gate
+        for gate, _, targets, symbols in reversed(operations):
+            inverse = np.conj(gate.get_matrix()).T
 
-            # Add the gate to the circuit
-            self.add_gate(gate, instruction[-1])
+            apply_gate_to_tensor(state, inverse, targets)
 
-        self.apply()
+            for index, symbol in symbols:
+                derivative = apply_gate_to_tensor(
+                    state.copy(), gate.get_derivative(index), targets
+                )
+                gradient[symbol] = gradient.get(symbol, 0.0) + 2 * float(
+                    np.real(np.vdot(adjoint, derivative))
+                )
+
+            apply_gate_to_tensor(adjoint, inverse, targets)
+
+        return gradient
+
+    def __parameter_shift_gradient(self, operations, observable):
+        if callable(observable):
+            expectation = lambda state: float(observable(np.reshape(state, -1)))
+        else:
+            expectation = lambda state: float(
+                np.real(
+                    np.vdot(np.reshape(state, -1), observable @ np.reshape(state, -1))
+                )
+            )
 
-    def __appropriate_index(self, index):
-        return index if self.__is_big_endian else self.__size - index - 1
+        gradient = dict()
+
+        # Shift each occurrence of each global parameter separately
+        for i, (gate, params, targets, symbols) in enumerate(operations):
+            for index, symbol in symbols:
+                derivative = 0.0
+
+                for coefficient, shift in gate.get_shift_rule(index):
+                    shifted_params = list(params)
+                    shifted_params[index] += shift
+
+                    shifted_operations = list(operations)
+                    shifted_operations[i] = (
+                        QuantumGate(gate.name, *shifted_params),
+                        shifted_params,
+                        targets,
+                        symbols,
+                    )
+
+                    derivative += coefficient * expectation(
+                        self.__run_operations(shifted_operations)
+                    )
+
+                gradient[symbol] = gradient.get(symbol, 0.0) + derivative
+
+        return gradient
 
     def initialise_qubit(self, index, state):
         assert not self.__initialised, "Can not set states after adding a gate"
-        assert index < self.__size, "Qubit not in register"
-        np.testing.assert_array_equal(
-            np.around(np.sum(np.absolute(state) ** 2)),
-            self.__one_test,
-            "Non-quantum mechanical state",
-            False,
+        self._check_state(index, state)
+
+        # Check that the state can be simulated before changing anything
+        leave_stabilizer_mode = (
+            self.__stabilizer and self.__stabilizer_preparation(state) is None
         )
+        if leave_stabilizer_mode:
+            self.__assert_statevector_size()
 
-        index = self.__appropriate_index(index)
+        index = self._appropriate_index(index)
 
         self.__dirty = True
         self.__qubits[index] = state
 
+        if leave_stabilizer_mode:
+            self.__leave_stabilizer_mode()
+
     def get_statevector(self):
+        if self.__stabilizer:
+            self.__leave_stabilizer_mode()
+
         if self.__dirty:
             # TODO: if time allows, make this more efficient
             self.__statevector = tensor_product_vector_list(self.__qubits)
+            self.__probabilities = None
 
         self.__dirty = False
 
         return self.__statevector
 
-    def store_as_qasm(
-        self,
-        filename=datetime.now().strftime("%d/%m/%Y-%H:%M:%S"),
-        qubits_to_measure=None,
-    ):
-        assert (
-            all([target < self.__size for target in qubits_to_measure])
-            if qubits_to_measure is not None
-            else True
+    def get_probabilities(self):
+        """
+        Returns the probabilities of all the basis states, cached until the state changes
+        """
+        statevector = self.get_statevector()
+
+        if self.__probabilities is None:
+            self.__probabilities = np.absolute(statevector) ** 2
+
+        return self.__probabilities
+
+    def get_marginal_probabilities(self, qubits_idx):
+        """
+        Returns the exact probabilities of the basis states of some of the qubits,
+        ordered like the keys returned by measure for the same qubits
+        """
+        qubits_idx = self.__check_qubits_subset(qubits_idx)
+
+        # Sum the probabilities over the axes of the other qubits
+        probabilities = np.reshape(self.get_probabilities(), self.__size * [2])
+        others = [i for i in range(self.__size) if i not in qubits_idx]
+        marginal = np.sum(probabilities, axis=tuple(others))
+
+        # The remaining axes are sorted, so put them in the requested order
+        remaining = sorted(qubits_idx)
+        marginal = np.transpose(marginal, [remaining.index(i) for i in qubits_idx])
+
+        return np.reshape(marginal, -1)
+
+    def get_reduced_density_matrix(self, qubits_idx):
+        """
+        Returns the density matrix of some of the qubits, tracing out the others
+        """
+        qubits_idx = self.__check_qubits_subset(qubits_idx)
+
+        # Bring the kept qubits to the front, then contract over the traced out ones
+        tensor = np.reshape(self.get_statevector(), self.__size * [2])
+        tensor = np.moveaxis(tensor, qubits_idx, list(range(len(qubits_idx))))
+        tensor = np.reshape(tensor, (2 ** len(qubits_idx), -1))
+
+        return tensor @ np.conj(tensor).T
+
+    def __check_qubits_subset(self, qubits_idx):
+        assert isinstance(qubits_idx, list), "Incorrect way of indexing qubits"
+        assert len(qubits_idx) > 0, "Need at least one qubit"
+        assert all(
+            [0 <= qubit < self.__size for qubit in qubits_idx]
         ), "Some qubits not in register"
+        assert len(qubits_idx) == len(set(qubits_idx)), "All qubits must be different!"
 
-        if qubits_to_measure is not None:
-            qubits_to_measure = [
-                self.__appropriate_index(qubit) for qubit in qubits_to_measure
-            ]
+        return [self._appropriate_index(i) for i in qubits_idx]
 
-        _list_to_qasm(self.__operations, self.__size, filename, qubits_to_measure)
-        return
+    def _get_operations(self):
+        return self.__operations
 
     def add_gate(self, gate, targets):
-        self.__do_assertions(gate, targets)
+        self._check_gate(gate, targets)
+
+        # Check that the gate can be simulated before changing anything
+        leave_stabilizer_mode = (
+            self.__stabilizer and gate.name not in StabilizerTableau.supported_gates
+        )
+        if leave_stabilizer_mode:
+            self.__assert_statevector_size()
+
+        self.__operations.append(gate.name, gate.params, targets)
+
+        self.__unapplied_gates = True
+        self.__initialised = True
 
-        self.__operations.append((gate, targets))
+        if leave_stabilizer_mode:
+            self.__leave_stabilizer_mode()
+        elif not self.__stabilizer:
+            self.__add_to_unitary(gate, targets)
 
+    def __add_to_unitary(self, gate, targets):
         # First, retrieve the matrix from the Gate object and correct the indexing
         gate = gate.get_matrix()
 
         for i in range(len(targets)):
-            targets[i] = self.__appropriate_index(targets[i])
+            targets[i] = self._appropriate_index(targets[i])
 
         affected_qubits = int(math.log(gate.shape[0], 2))
         ############################################
         if affected_qubits == 1:
             # If a single qubit gate, simply add it to the qubits caches
             for target in targets:
-                target = self.__appropriate_index(target)
+                target = self._appropriate_index(target)
                 self.__gate_cache[target] = gate @ self.__gate_cache[target]
             self.__opmatrix_calculated = False
         else:
@@ -167,32 +318,72 @@ class QuantumRegister:
             else:
                 tmp = gate
 
-            gate = reorder_gate(tmp, self.__size, self.__is_big_endian, *targets)
+            gate = reorder_gate(
+                tmp, self.__size, self.get_endianness() == "big", *targets
+            )
 
             ops_matrix = self.__calculate_operators_product()
 
             self.__operators_matrix = gate @ ops_matrix
         ############################################
 
-        self.__unapplied_gates = True
-        self.__initialised = True
+    def __stabilizer_preparation(self, state):
+        """
+        Returns the Clifford gates preparing a single qubit state from the ground state,
+        if it is one of the common states
+        """
+        preparations = [
+            (self.zero, []),
+            (self.one, ["x"]),
+            (self.plus, ["h"]),
+            (self.minus, ["x", "h"]),
+        ]
+
+        for common_state, gates in preparations:
+            if np.allclose(state, common_state):
+                return gates
 
-    def __do_assertions(self, gate, targets):
+        return None
+
+    def __get_tableau(self):
+        if self.__tableau is None:
+            self.__tableau = StabilizerTableau(self.__size)
+
+            for index, state in enumerate(self.__qubits):
+                for gate_name in self.__stabilizer_preparation(state):
+                    self.__tableau.apply_gate(gate_name, [index])
+
+        return self.__tableau
+
+    def __assert_statevector_size(self):
+        assert (
+            self.__size < 26
+        ), "Maximum allowed qubits is 25, unless the circuit only has Clifford gates"
+
+    def __leave_stabilizer_mode(self):
         """
-        Just a bunch of assertions to check the sanity of the gate parameters
+        Switches to the statevector simulation, replaying the gates run so far
         """
-        assert all(
-            [target < self.__size for target in targets]
-        ), "Some qubits not in register"
-        assert len(targets) == len(set(targets)), "All target qubits must be different!"
+        self.__assert_statevector_size()
+
+        self.__stabilizer = False
+        self.__tableau = None
+        self.__operators_matrix = np.eye(2 ** self.__size)
+
+        applied = self.__operations[: self.__tableau_operations]
+        pending = self.__operations[self.__tableau_operations :]
 
-        affected_qubits = int(math.log(gate.get_matrix().shape[0], 2))
-        assert affected_qubits <= self.__size, "Gate too big for circuit"
+        for name, params, targets in applied:
+            self.__add_to_unitary(QuantumGate(name, *params), targets)
 
-        if affected_qubits > 1:
-            assert affected_qubits == len(
-                targets
-            ), "Too many/too few arguments for target qubits"
+        if len(applied) > 0:
+            self.__unapplied_gates = True
+            self.apply()
+
+        for name, params, targets in pending:
+            self.__add_to_unitary(QuantumGate(name, *params), targets)
+
+        self.__unapplied_gates = len(pending) > 0
 
     def __calculate_operators_product(self):
         """
@@ -214,54 +405,53 @@ class QuantumRegister:
             return
         self.__unapplied_gates = False
 
+        if self.__stabilizer:
+            tableau = self.__get_tableau()
+
+            for name, _, targets in self.__operations[self.__tableau_operations :]:
+                tableau.apply_gate(name, targets)
+
+            self.__tableau_operations = len(self.__operations)
+            return
+
         # Simply retrieve the statevector and the unitary and multiply
         statevector = self.get_statevector()
         operators_matrix = self.__calculate_operators_product()
 
         self.__statevector = operators_matrix @ statevector
+        self.__probabilities = None
 
         self.__operators_matrix = np.eye(2 ** self.__size)
 
     def measure(self, shots, qubits_idx=None):
-        assert qubits_idx is None or isinstance(
-            qubits_idx, list
-        ), "Incorrect way of indexing qubits"
-
-        if qubits_idx == None:
-            qubits_idx = [self.__appropriate_index(i) for i in range(self.__size)]
-        else:
-            qubits_idx = [self.__appropriate_index(i) for i in qubits_idx]
-
-        assert (
-            max(qubits_idx) < self.__size or min(qubits_idx) >= 0
-        ), "Some qubits not in register"
+        qubits_idx = self._check_measured_qubits(qubits_idx)
 
         if self.__unapplied_gates:
             warnings.warn(
                 "Some gates are not applied yet! Call QuantumRegister.apply()"
             )
 
-        # Retrieve the statevector and sample from it
-        statevector = self.get_statevector()
+        if self.__stabilizer:
+            # Sample from the tableau directly as bits, and cherrypick the needed qubits
+            samples = self.__get_tableau().sample(shots).tolist()
+
+            return dict(
+                Counter(
+                    "".join([str(sample[i]) for i in qubits_idx]) for sample in samples
+                )
+            )
+
+        # Retrieve the probabilities and sample from them
+        probabilities = self.get_probabilities()
         values, counts = np.unique(
-            np.random.choice(len(statevector), shots, p=np.absolute(statevector) ** 2),
+            np.random.choice(len(probabilities), shots, p=probabilities),
             return_counts=True,
         )
 
-        # Convert to binary
+        # Bring the values back to the host
         try:
             values = list(np.asnumpy(values))
         except:
             values = list(values)
-        values = [format(i, "0" + str(self.__size) + "b") for i in values]
-
-        # Cherrypick the needed qubits
-        res = dict()
-        for i, value in enumerate(values):
-            key = "".join([value[i] for i in qubits_idx])
-            if key in res.keys():
-                res[key] += counts[i].item()
-            else:
-                res[key] = counts[i].item()
 
-        return res
+        return self._counts_of_samples(values, counts.tolist(), qubits_idx)
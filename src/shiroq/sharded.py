@@ -0,0 +1,315 @@
+# Shared memory lives on the host, so the sharded register always works with NumPy
+import numpy as np
+
+import math
+import os
+import warnings
+from multiprocessing import get_context
+from threading import BrokenBarrierError
+
+# Shared memory was added in Python 3.8, which only the sharded register needs
+try:
+    from multiprocessing.shared_memory import SharedMemory
+except ModuleNotFoundError:
+    raise ImportError("ShardedQuantumRegister needs Python 3.8 or later")
+
+from .base import BaseRegister
+from .circuit import Circuit
+from .utils import apply_gate_to_tensor, tensor_product_vector_list
+
+
+def _to_host(array):
+    try:
+        return array.get()
+    except AttributeError:
+        return np.asarray(array)
+
+
+def _rank_bits(rank, global_qubits):
+    """
+    Returns the values of the high-order (global) qubits owned by a worker
+    """
+    return [(rank >> (global_qubits - q - 1)) & 1 for q in range(global_qubits)]
+
+
+def _apply_sharded_gate(state, gate, targets, global_qubits, rank, barrier):
+    size = state.ndim
+    bits = _rank_bits(rank, global_qubits)
+    global_targets = [target for target in targets if target < global_qubits]
+
+    if len(global_targets) == 0:
+        # All targets are local, so the gate only touches the worker's own shard
+        apply_gate_to_tensor(
+            state[tuple(bits)], gate, [target - global_qubits for target in targets]
+        )
+        return
+
+    # The workers that only differ on the global targets form a group sharing the
+    # amplitudes of the gate. Each of them takes over the slice of the local qubits
+    # (not targeted by the gate) selected by its own bits on the global targets,
+    # so that the group reads and writes disjoint parts of each other's shards
+    free_local = [q for q in range(global_qubits, size) if q not in targets]
+
+    selector = bits + [slice(None)] * (size - global_qubits)
+    for local, target in zip(free_local, global_targets):
+        selector[target] = slice(None)
+        selector[local] = bits[target]
+
+    axes = [sum(isinstance(s, slice) for s in selector[:target]) for target in targets]
+
+    # Wait for the local gates of the partners to finish before reading their shards,
+    # and for the exchange to finish before they carry on
+    barrier.wait()
+    apply_gate_to_tensor(state[tuple(selector)], gate, axes)
+    barrier.wait()
+
+
+def _worker(memory_name, size, global_qubits, rank, barrier, connection):
+    memory = SharedMemory(name=memory_name)
+    state = np.ndarray(size * (2,), dtype="complex", buffer=memory.buf)
+
+    try:
+        while True:
+            command, payload = connection.recv()
+
+            if command == "stop":
+                break
+
+            try:
+                if command == "init":
+                    # Write this shard of the product state
+                    bits = _rank_bits(rank, global_qubits)
+                    amplitude = np.prod([payload[q][bit] for q, bit in enumerate(bits)])
+                    shard = tensor_product_vector_list(payload[global_qubits:])
+                    state[tuple(bits)] = amplitude * np.reshape(
+                        shard, (size - global_qubits) * (2,)
+                    )
+                elif command == "apply":
+                    for gate, targets in payload:
+                        _apply_sharded_gate(
+                            state, gate, targets, global_qubits, rank, barrier
+                        )
+            except Exception as e:
+                # Release the partners waiting at the barrier before reporting
+                barrier.abort()
+                connection.send(e)
+            else:
+                connection.send(None)
+    finally:
+        del state
+        memory.close()
+
+
+class ShardedQuantumRegister(BaseRegister):
+    """
+    A register whose statevector is split between local worker processes. The
+    statevector lives in shared memory, and each worker owns the slice selected
+    by the high-order (global) qubits. Gates on the remaining (local) qubits are
+    applied by each worker without any communication, while gates on global qubits
+    are applied by the groups of workers sharing those amplitudes.
+    """
+
+    def __init__(self, size, workers=None, endianness="big"):
+        assert size < 31, "Maximum allowed qubits is 30"
+        super().__init__(size, endianness)
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        assert workers > 0, "Need at least one worker"
+
+        self.__size = size
+
+        # Shards are indexed by the global qubits, so the number of workers is rounded
+        # down to a power of two, keeping at least 3 local qubits for the largest gates
+        self.__global_qubits = min(int(math.log2(workers)), max(size - 3, 0))
+        workers = 2 ** self.__global_qubits
+
+        self.__memory = SharedMemory(create=True, size=16 * 2 ** size)
+        self.__statevector = np.ndarray(
+            2 ** size, dtype="complex", buffer=self.__memory.buf
+        )
+
+        context = get_context()
+        self.__barrier = context.Barrier(workers)
+        self.__workers = list()
+        self.__connections = list()
+
+        for rank in range(workers):
+            parent_end, child_end = context.Pipe()
+            worker = context.Process(
+                target=_worker,
+                args=(
+                    self.__memory.name,
+                    size,
+                    self.__global_qubits,
+                    rank,
+                    self.__barrier,
+                    child_end,
+                ),
+                daemon=True,
+            )
+            worker.start()
+
+            self.__workers.append(worker)
+            self.__connections.append(parent_end)
+
+        self.__closed = False
+
+        self.reset()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Stops the workers and frees the shared statevector
+        """
+        if self.__closed:
+            return
+        self.__closed = True
+
+        for connection in self.__connections:
+            connection.send(("stop", None))
+        for worker in self.__workers:
+            worker.join()
+
+        del self.__statevector
+        self.__memory.close()
+        self.__memory.unlink()
+
+    def reset(self):
+        # operations list
+        self.__operations = Circuit()
+        self.__pending = list()
+
+        # Needed for efficiency purposes
+        self.__dirty = True
+
+        # Needed for correctness
+        self.__initialised = False
+
+        # initialise all states to zero
+        self.__qubits = np.stack([_to_host(self.zero)] * self.__size, axis=0)
+
+    def get_workers_count(self):
+        return len(self.__workers)
+
+    def initialise_qubit(self, index, state):
+        assert not self.__initialised, "Can not set states after adding a gate"
+        state = _to_host(state)
+        self._check_state(index, state)
+
+        index = self._appropriate_index(index)
+
+        self.__dirty = True
+        self.__qubits[index] = state
+
+    def get_statevector(self):
+        """
+        Returns a copy of the statevector, which stays valid after the register
+        is closed and the shared memory is freed
+        """
+        return self.__shared_statevector().copy()
+
+    def __shared_statevector(self):
+        """
+        Returns the statevector as a view of the shared memory
+        """
+        assert not self.__closed, "Register is closed"
+
+        if self.__dirty:
+            self.__send_to_workers("init", self.__qubits)
+
+        self.__dirty = False
+
+        return self.__statevector
+
+    def _get_operations(self):
+        return self.__operations
+
+    def add_gate(self, gate, targets):
+        self._check_gate(gate, targets)
+
+        self.__operations.append(gate.name, gate.params, targets)
+
+        matrix = _to_host(gate.get_matrix())
+
+        if gate.is_single_qubit():
+            # Single qubit gates are applied to each of the targets
+            for target in targets:
+                self.__pending.append((matrix, [target]))
+        else:
+            self.__pending.append((matrix, list(targets)))
+
+        self.__initialised = True
+
+    def __send_to_workers(self, command, payload):
+        assert not self.__closed, "Register is closed"
+
+        for connection in self.__connections:
+            connection.send((command, payload))
+
+        errors = [connection.recv() for connection in self.__connections]
+        errors = [
+            e for e in errors if e is not None and not isinstance(e, BrokenBarrierError)
+        ]
+
+        if self.__barrier.broken:
+            self.__barrier.reset()
+
+        if len(errors) > 0:
+            raise errors[0]
+
+    def apply(self):
+        if len(self.__pending) == 0:
+            return
+
+        # Make sure the initial state is written before applying the gates
+        self.__shared_statevector()
+
+        pending, self.__pending = self.__pending, list()
+        self.__send_to_workers("apply", pending)
+
+    def measure(self, shots, qubits_idx=None):
+        qubits_idx = self._check_measured_qubits(qubits_idx)
+
+        if len(self.__pending) > 0:
+            warnings.warn(
+                "Some gates are not applied yet! Call ShardedQuantumRegister.apply()"
+            )
+
+        # Sample how many shots land in each shard, then sample within the shards,
+        # so that only one shard's probabilities are held in memory at a time
+        shards = self.__shared_statevector().reshape(len(self.__workers), -1)
+
+        shard_probabilities = np.array(
+            [np.sum(np.absolute(shard) ** 2) for shard in shards]
+        )
+        shard_shots = np.random.multinomial(
+            shots, shard_probabilities / np.sum(shard_probabilities)
+        )
+
+        samples = list()
+        for i, shard in enumerate(shards):
+            if shard_shots[i] == 0:
+                continue
+
+            probabilities = np.absolute(shard) ** 2
+            samples.append(
+                i * shard.shape[0]
+                + np.random.choice(
+                    shard.shape[0],
+                    shard_shots[i],
+                    p=probabilities / np.sum(probabilities),
+                )
+            )
+
+        if len(samples) == 0:
+            return dict()
+
+        values, counts = np.unique(np.concatenate(samples), return_counts=True)
+
+        return self._counts_of_samples(values.tolist(), counts.tolist(), qubits_idx)
@@ -0,0 +1,244 @@
+# The tableau only holds bits, which is better handled on the CPU
+import numpy as np
+
+
+class StabilizerTableau:
+    """
+    Tableau of a stabilizer state, following Aaronson and Gottesman (2004).
+    The first half of the rows holds the destabilizers and the second half the
+    stabilizers, each as the X and Z bits of a Pauli string along with a sign bit.
+    Clifford gates and measurements take polynomial time in the number of qubits.
+    """
+
+    supported_gates = ["i", "x", "y", "z", "h", "s", "cx", "cy", "cz", "swap"]
+
+    def __init__(self, size):
+        self.__size = size
+
+        # Start in the all-zero state, stabilized by the Z operators
+        self.__x = np.zeros((2 * size, size), dtype=bool)
+        self.__z = np.zeros((2 * size, size), dtype=bool)
+        self.__r = np.zeros(2 * size, dtype=bool)
+
+        self.__x[:size] = np.eye(size, dtype=bool)
+        self.__z[size:] = np.eye(size, dtype=bool)
+
+        # Affine space of the outcomes, cached until the state changes
+        self.__outcomes = None
+
+    def copy(self):
+        res = StabilizerTableau.__new__(StabilizerTableau)
+        res.__size = self.__size
+        res.__x = self.__x.copy()
+        res.__z = self.__z.copy()
+        res.__r = self.__r.copy()
+        res.__outcomes = self.__outcomes
+
+        return res
+
+    def apply_gate(self, name, targets):
+        assert (
+            name in self.supported_gates
+        ), "Unsupported Clifford gate {}, supported gates are {}".format(
+            name, self.supported_gates
+        )
+
+        self.__outcomes = None
+
+        if name in ["cx", "cy", "cz", "swap"]:
+            a, b = targets
+
+            if name == "cx":
+                self.__cx(a, b)
+            elif name == "cy":
+                self.__s(b)
+                self.__z_gate(b)
+                self.__cx(a, b)
+                self.__s(b)
+            elif name == "cz":
+                self.__h(b)
+                self.__cx(a, b)
+                self.__h(b)
+            else:
+                self.__cx(a, b)
+                self.__cx(b, a)
+                self.__cx(a, b)
+            return
+
+        # Single qubit gates are applied to each of the targets
+        for a in targets:
+            if name == "x":
+                self.__r ^= self.__z[:, a]
+            elif name == "y":
+                self.__r ^= self.__x[:, a] ^ self.__z[:, a]
+            elif name == "z":
+                self.__z_gate(a)
+            elif name == "h":
+                self.__h(a)
+            elif name == "s":
+                self.__s(a)
+
+    def __z_gate(self, a):
+        self.__r ^= self.__x[:, a]
+
+    def __h(self, a):
+        self.__r ^= self.__x[:, a] & self.__z[:, a]
+        self.__x[:, a], self.__z[:, a] = self.__z[:, a].copy(), self.__x[:, a].copy()
+
+    def __s(self, a):
+        self.__r ^= self.__x[:, a] & self.__z[:, a]
+        self.__z[:, a] ^= self.__x[:, a]
+
+    def __cx(self, a, b):
+        self.__r ^= self.__x[:, a] & self.__z[:, b] & ~(self.__x[:, b] ^ self.__z[:, a])
+        self.__x[:, b] ^= self.__x[:, a]
+        self.__z[:, a] ^= self.__z[:, b]
+
+    @staticmethod
+    def __phase_exponent(x1, z1, x2, z2):
+        """
+        Returns the power of i picked up by multiplying the Pauli strings (x1, z1)
+        and (x2, z2), ignoring their signs. Both can be stacks of rows
+        """
+        # Multiplying two different single qubit Paulis picks up a factor of i when
+        # they come in the cyclic order (X, Y, Z), and a factor of -i otherwise
+        y1, y2 = x1 & z1, x2 & z2
+        only_x1, only_x2 = x1 & ~z1, x2 & ~z2
+        only_z1, only_z2 = z1 & ~x1, z2 & ~x2
+
+        plus = (only_x1 & y2) | (y1 & only_z2) | (only_z1 & only_x2)
+        minus = (only_x1 & only_z2) | (y1 & only_x2) | (only_z1 & y2)
+
+        return np.count_nonzero(plus, axis=-1) - np.count_nonzero(minus, axis=-1)
+
+    @classmethod
+    def __product_sign(cls, x1, z1, r1, x2, z2, r2):
+        """
+        Returns the sign bit of the product of the Pauli strings (x1, z1, r1) and (x2, z2, r2),
+        where the first one can be a stack of rows
+        """
+        exponent = 2 * r1 + 2 * r2 + cls.__phase_exponent(x1, z1, x2, z2)
+
+        return np.mod(exponent, 4) == 2
+
+    def __product_sign_of_rows(self, rows):
+        """
+        Returns the sign bit of the ordered product of the given (commuting) rows
+        """
+        x = self.__x[rows]
+        z = self.__z[rows]
+
+        # Running product of the rows before each of them
+        previous_x = np.zeros_like(x)
+        previous_z = np.zeros_like(z)
+        previous_x[1:] = np.logical_xor.accumulate(x[:-1], axis=0)
+        previous_z[1:] = np.logical_xor.accumulate(z[:-1], axis=0)
+
+        # Each partial product is Hermitian, so the powers of i add up
+        exponent = 2 * np.sum(self.__r[rows]) + np.sum(
+            self.__phase_exponent(previous_x, previous_z, x, z)
+        )
+
+        return np.mod(exponent, 4) == 2
+
+    def __rowsum(self, rows, i):
+        """
+        Left-multiplies the given rows by row i
+        """
+        self.__r[rows] = self.__product_sign(
+            self.__x[rows],
+            self.__z[rows],
+            self.__r[rows],
+            self.__x[i],
+            self.__z[i],
+            self.__r[i],
+        )
+        self.__x[rows] ^= self.__x[i]
+        self.__z[rows] ^= self.__z[i]
+
+    def measure(self, a, outcome=None):
+        """
+        Measures qubit a in the computational basis, collapsing the state. If the
+        outcome is random, it is either the one given or a coin flip
+        """
+        n = self.__size
+
+        anticommuting = np.flatnonzero(self.__x[n:, a])
+
+        if len(anticommuting) > 0:
+            # Random outcome: make the first anticommuting stabilizer the only
+            # row with an X on qubit a, then replace it by +-Z_a
+            p = n + anticommuting[0]
+
+            rows = np.flatnonzero(self.__x[:, a])
+            rows = rows[rows != p]
+            if len(rows) > 0:
+                self.__rowsum(rows, p)
+
+            self.__x[p - n], self.__z[p - n], self.__r[p - n] = (
+                self.__x[p],
+                self.__z[p],
+                self.__r[p],
+            )
+
+            if outcome is None:
+                outcome = np.random.randint(2)
+
+            self.__outcomes = None
+
+            self.__x[p] = False
+            self.__z[p] = False
+            self.__z[p, a] = True
+            self.__r[p] = bool(outcome)
+
+            return int(outcome)
+
+        # Deterministic outcome: Z_a is the product of the stabilizers
+        # paired with the destabilizers having an X on qubit a
+        return int(self.__product_sign_of_rows(n + np.flatnonzero(self.__x[:n, a])))
+
+    def sample(self, shots):
+        """
+        Samples measurements of all the qubits without collapsing the state,
+        returned as an array of bits with one row per shot
+        """
+        if self.__outcomes is None:
+            self.__outcomes = self.__outcomes_space()
+
+        offset, basis = self.__outcomes
+
+        coefficients = np.random.randint(2, size=(shots, basis.shape[0]))
+
+        return np.mod(offset + coefficients @ basis, 2)
+
+    def __outcomes_space(self):
+        """
+        Returns the affine space of the outcomes of measuring all the qubits, as an
+        offset and a basis of bits
+        """
+        n = self.__size
+
+        # The outcomes are uniformly distributed over an affine space: any single outcome,
+        # shifted by the span of the X parts of the stabilizers
+        tableau = self.copy()
+        offset = np.array([tableau.measure(a) for a in range(n)], dtype=int)
+
+        # Row-reduce the X parts of the stabilizers to get a basis of the span
+        basis = self.__x[n:].copy()
+        rank = 0
+        for a in range(n):
+            pivots = np.flatnonzero(basis[rank:, a])
+            if len(pivots) == 0:
+                continue
+
+            pivot = rank + pivots[0]
+            basis[[rank, pivot]] = basis[[pivot, rank]]
+
+            rows = np.flatnonzero(basis[:, a])
+            basis[rows[rows != rank]] ^= basis[rank]
+
+            rank += 1
+            if rank == n:
+                break
+
+        return offset, basis[:rank].astype(int)
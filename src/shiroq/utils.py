@@ -1,12 +1,4 @@
-try:
-    import cupy as np
-except ModuleNotFoundError:
-    try:
-        import numpy as np
-    except ModuleNotFoundError:
-        print("Neither CuPy nor NumPy are installed")
-
-import matplotlib.pyplot as plt
+from .backend import np
 
 
 def create_state(psi, phi, theta):
@@ -88,8 +80,33 @@ def reorder_gate(G, circuit_length, is_big_endian, *new_targets):
     )
 
 
+def apply_gate_to_tensor(tensor, gate, axes):
+    """
+    This function applies a (multi)qubit gate in place to a statevector reshaped
+    as a tensor with one axis per qubit, acting on the given axes in order.
+    It works on host (NumPy) arrays even when CuPy is the backend
+    """
+    xp = np.get_array_module(tensor) if hasattr(np, "get_array_module") else np
+
+    affected_qubits = len(axes)
+
+    # Contract the input legs of the gate with the target axes,
+    # then move its output legs back to where the target axes were
+    tmp = xp.tensordot(
+        xp.reshape(gate, 2 * affected_qubits * [2]),
+        tensor,
+        axes=(list(range(affected_qubits, 2 * affected_qubits)), list(axes)),
+    )
+    tensor[...] = xp.moveaxis(tmp, list(range(affected_qubits)), list(axes))
+
+    return tensor
+
+
 def plot_counts(counts):
     assert isinstance(counts, dict), "Must be a dict of counts!"
     assert len(counts.keys()) > 0, "Dict is empty!"
 
+    # Matplotlib is slow to import and only needed here
+    import matplotlib.pyplot as plt
+
     plt.bar(counts.keys(), counts.values(), 0.75, color="g")